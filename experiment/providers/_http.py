@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import weakref
+
+import httpx
+
+# Shared connection pool for every OpenAI-compatible client so TCP/TLS
+# connections are reused across providers, models and tasks.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# Fail fast on connect/pool waits; read stays long because reasoning models can
+# be silent for minutes before their first streamed token.
+HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=600.0, write=30.0, pool=5.0)
+# HTTP/2 multiplexes concurrent streams over one connection per host; it needs
+# the optional h2 package (httpx[http2]), otherwise HTTP/1.1 keep-alive is used.
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Pooled connections belong to the event loop that opened them, so each running
+# loop gets its own client; a later asyncio.run() starts with a fresh pool.
+_HTTP_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the running loop's shared client, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _HTTP_CLIENTS.get(loop)
+    if client is None:
+        client = _HTTP_CLIENTS[loop] = httpx.AsyncClient(
+            http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+        )
+    return client
+
+
+async def aclose_http_client() -> None:
+    """Close the running loop's shared client; call before the loop shuts down."""
+    client = _HTTP_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import functools
+import mmap
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict
+
+try:
+    # SIMD (AVX2/SSSE3) base64 codec; same API as the stdlib module.
+    import pybase64
+except ImportError:  # pragma: no cover - optional speedup
+    import base64 as pybase64  # type: ignore[no-redef]
+
+
+_MIME_BY_EXT = MappingProxyType(
+    {
+        ".png": "image/png",
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".webp": "image/webp",
+    }
+)
+
+
+def _detect_mime(path: str) -> str:
+    # Plain string slicing avoids building a PurePath just to read the suffix
+    dot = path.rfind(".")
+    if dot == -1:
+        return "image/png"
+    return _MIME_BY_EXT.get(path[dot:].lower(), "image/png")
+
+
+# Every provider in a task is handed the same image, so it is mapped and
+# base64-encoded once; results are memoized on (path, mtime, size) and redone
+# only when the file changes. Only the base64 text is kept, not the raw bytes.
+@functools.lru_cache(maxsize=32)
+def _encode_image_cached(path: str, mtime_ns: int, size: int) -> str:
+    if size == 0:
+        return ""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        # The encoder reads straight from the mapping, without an extra copy
+        return pybase64.b64encode(m).decode("ascii")
+
+
+# Raw bytes are only needed by Gemini's inline_data parts, so they get their
+# own small cache instead of sitting next to every base64 entry.
+@functools.lru_cache(maxsize=4)
+def _read_image_cached(path: str, mtime_ns: int, size: int) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def encode_image(image_path: str | Path) -> str:
+    """Return the base64 text of an image, encoding it at most once."""
+    st = os.stat(image_path)
+    return _encode_image_cached(str(image_path), st.st_mtime_ns, st.st_size)
+
+
+def encode_image_data_url(image_path: str | Path) -> str:
+    data = encode_image(image_path)
+    return f"data:{_detect_mime(str(image_path))};base64,{data}"
+
+
+def encode_image_inline(image_path: str | Path) -> Dict[str, object]:
+    st = os.stat(image_path)
+    raw = _read_image_cached(str(image_path), st.st_mtime_ns, st.st_size)
+    return {"mime_type": _detect_mime(str(image_path)), "data": raw}
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import io
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from ._http import get_http_client
+from ._image import encode_image_data_url
+from .base import BaseProvider, ProviderResponse, retry_after_seconds
+
+load_dotenv()
+
+# Number of small stream deltas coalesced before each StringIO write
+_DELTA_FLUSH_EVERY = 64
+
+
+def build_chat_messages(
+    system_prompt: str, user_prompt: str, image_data_url: Optional[str] = None
+) -> list[dict[str, Any]]:
+    messages: list[dict[str, Any]] = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+
+    content: list[dict[str, Any]] = [{"type": "text", "text": user_prompt}]
+    if image_data_url:
+        content.append({"type": "image_url", "image_url": {"url": image_data_url}})
+    messages.append({"role": "user", "content": content})
+    return messages
+
+
+class OpenAICompatProvider(BaseProvider):
+    """Streaming chat-completions provider for any OpenAI-compatible endpoint."""
+
+    # Subclasses point these at their endpoint's credentials and base URL
+    api_key_env: str
+    base_url_env: Optional[str] = None
+    default_base_url: Optional[str] = None
+
+    def __init__(self, model_name: str, **model_configurations: Any):
+        super().__init__(model_name, **model_configurations)
+        self.api_key = os.environ.get(self.api_key_env)
+        self.base_url = (
+            os.environ.get(self.base_url_env, self.default_base_url)
+            if self.base_url_env
+            else self.default_base_url
+        )
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,  # type: ignore[arg-type]
+            base_url=self.base_url,
+            http_client=get_http_client(),
+            # Retries with backoff are handled by BaseProvider.generate
+            max_retries=0,
+        )
+
+    def _encode_image_data_url(self, image_path: str | Path):
+        return encode_image_data_url(image_path)
+
+    def _build_messages(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        image_path: Optional[str],
+        image_data_url: Optional[str],
+    ) -> list[dict[str, Any]]:
+        if image_path and not image_data_url:
+            image_data_url = self._encode_image_data_url(image_path)
+        return build_chat_messages(system_prompt, user_prompt, image_data_url)
+
+    def _build_kwargs(
+        self, messages: list[dict[str, Any]], json_schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = dict(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        # Apply model-specific overrides, if any
+        kwargs.update(self.model_configurations)
+
+        # JSON schema support for response_format
+        if json_schema is not None:
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": json_schema,
+            }
+        return kwargs
+
+    async def _generate_once(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        image_path: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        image_data_url: Optional[str] = None,
+        prebuilt_messages: Optional[list[dict[str, Any]]] = None,
+    ):
+        # The runner builds one messages list per task and shares it across
+        # providers; the SDK only reads it.
+        messages = prebuilt_messages or self._build_messages(
+            system_prompt, user_prompt, image_path, image_data_url
+        )
+        kwargs = self._build_kwargs(messages, json_schema)
+
+        start = time.perf_counter_ns()
+        first_token_time: Optional[int] = None
+        buf = io.StringIO()
+        http_status: Optional[int] = None
+        error_category: Optional[str] = None
+        error_message: Optional[str] = None
+        input_tokens = None
+        output_tokens = None
+        cached_tokens = None
+        retry_after_s: Optional[float] = None
+        response_params: Dict[str, Any] | None = None
+
+        # Bind hot-loop callables once instead of looking them up per chunk
+        pending: list[str] = []
+        append = pending.append
+        perf = time.perf_counter_ns
+
+        try:
+            # Raw response exposes the x-ratelimit-* headers for the limiter
+            raw = await self.client.chat.completions.with_raw_response.create(**kwargs)
+            self.rate_limiter.observe_headers(raw.headers)
+            stream = raw.parse()
+            async for chunk in stream:
+                # model is only needed once; skip the lookup after the first chunk
+                if response_params is None and chunk.model:
+                    response_params = {"model": chunk.model}
+
+                # usage on the terminal chunk when include_usage=True
+                usage = chunk.usage
+                if usage is not None and input_tokens is None and output_tokens is None:
+                    input_tokens = usage.prompt_tokens
+                    output_tokens = usage.completion_tokens
+                    details = usage.prompt_tokens_details
+                    if details is not None:
+                        cached_tokens = details.cached_tokens
+
+                # delta text; the usage-only terminal chunk has no choices
+                try:
+                    piece = chunk.choices[0].delta.content
+                except (AttributeError, IndexError):
+                    continue
+                if piece:
+                    if first_token_time is None:
+                        first_token_time = perf()
+                    append(piece)
+                    if len(pending) >= _DELTA_FLUSH_EVERY:
+                        buf.write("".join(pending))
+                        pending.clear()
+            http_status = 200
+        except Exception as e:
+            error_category = type(e).__name__
+            error_message = str(e)
+            text = None
+            # Try to extract HTTP status from exceptions
+            if hasattr(e, "response") and hasattr(e.response, "status_code"):
+                http_status = e.response.status_code
+                retry_after_s = retry_after_seconds(e.response.headers)
+        else:
+            buf.write("".join(pending))
+            text = buf.getvalue()
+            # Only pay for a full strip pass when there is padding to remove
+            if text and (text[0].isspace() or text[-1].isspace()):
+                text = text.strip()
+
+        end = time.perf_counter_ns()
+        ttft_ms = (first_token_time - start) / 1e6 if first_token_time is not None else None
+        total_latency_ms = (end - start) / 1e6
+
+        # Char count as fallback
+        output_chars = len(text) if text else None
+
+        return ProviderResponse(
+            text=text,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            output_chars=output_chars,
+            ttft_ms=ttft_ms,
+            total_latency_ms=total_latency_ms,
+            http_status=http_status,
+            error_category=error_category,
+            error_message=error_message,
+            response_params=response_params,
+            cached_tokens=cached_tokens,
+            retry_after_s=retry_after_s,
+        )
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
 
+from .ratelimit import get_rate_limiter
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ProviderResponse:
     text: Optional[str]
     input_tokens: Optional[int]
     output_tokens: Optional[int]
-    input_chars: Optional[int]
     output_chars: Optional[int]
     ttft_ms: Optional[float]
     total_latency_ms: Optional[float]
@@ -17,14 +21,76 @@ class ProviderResponse:
     error_category: Optional[str]
     error_message: Optional[str] = None
     response_params: Optional[Dict[str, Any]] = None
+    # Prompt tokens served from the provider-side prompt cache, when reported
+    cached_tokens: Optional[int] = None
+    # Server-requested wait before retrying (Retry-After on 429/503), in seconds
+    retry_after_s: Optional[float] = None
+
+
+# Rough prompt-size estimate used to pace the token bucket before usage is known
+_CHARS_PER_TOKEN = 4
+_IMAGE_TOKEN_ESTIMATE = 1000
+
+
+# Transport failures have no HTTP status but are worth another attempt: the
+# OpenAI SDK's connection/timeout errors and httpx errors raised mid-stream
+_RETRYABLE_ERRORS = frozenset(
+    {
+        "APIConnectionError",
+        "APITimeoutError",
+        "ConnectError",
+        "ConnectTimeout",
+        "PoolTimeout",
+        "ReadError",
+        "ReadTimeout",
+        "RemoteProtocolError",
+    }
+)
+
+
+def _is_retryable(response: ProviderResponse) -> bool:
+    status = response.http_status
+    if status is None:
+        return response.error_category in _RETRYABLE_ERRORS
+    return status == 429 or status >= 500
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Parse retry-after-ms or Retry-After (delta seconds or an HTTP date)."""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
 class BaseProvider:
     provider_name: str
+    # Retries on 429/5xx and connection errors, sleeping retry_base_delay_s *
+    # 2**attempt in between, or longer when the server sends Retry-After
+    max_retries: int = 3
+    retry_base_delay_s: float = 1.0
+    # A Retry-After beyond this (e.g. a daily quota reset) ends the retries
+    max_retry_after_s: float = 300.0
 
     def __init__(self, model_name: str, **model_configurations: Any):
         self.model_name = model_name
         self.model_configurations: Dict[str, Any] = model_configurations
+        self.rate_limiter = get_rate_limiter(self.provider_name, model_name)
 
     async def generate(
         self,
@@ -32,5 +98,46 @@ class BaseProvider:
         user_prompt: str,
         image_path: Optional[str] = None,
         json_schema: Optional[Dict[str, Any]] = None,
-    ):
+        image_data_url: Optional[str] = None,
+        **kwargs: Any,
+    ) -> ProviderResponse:
+        estimated_tokens = (len(system_prompt) + len(user_prompt)) // _CHARS_PER_TOKEN
+        if image_path or image_data_url:
+            estimated_tokens += _IMAGE_TOKEN_ESTIMATE
+
+        attempt = 0
+        while True:
+            async with self.rate_limiter.acquire(estimated_tokens) as debited:
+                response = await self._generate_once(
+                    system_prompt,
+                    user_prompt,
+                    image_path=image_path,
+                    json_schema=json_schema,
+                    image_data_url=image_data_url,
+                    **kwargs,
+                )
+            used_tokens = (
+                response.input_tokens + response.output_tokens
+                if response.input_tokens is not None and response.output_tokens is not None
+                else None
+            )
+            await self.rate_limiter.record(debited, response.http_status, used_tokens)
+            if attempt >= self.max_retries or not _is_retryable(response):
+                return response
+            delay = self.retry_base_delay_s * 2**attempt
+            if response.retry_after_s is not None:
+                if response.retry_after_s > self.max_retry_after_s:
+                    return response
+                delay = max(delay, response.retry_after_s)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _generate_once(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        image_path: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        image_data_url: Optional[str] = None,
+    ) -> ProviderResponse:
         raise NotImplementedError
@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import orjson
+from anthropic import AsyncAnthropic
+
+from ._http import get_http_client
+from ._image import _detect_mime, encode_image
+from ._openai_compat import OpenAICompatProvider
+from .anthropic_provider import AnthropicProvider
+from .base import BaseProvider, ProviderResponse
+from .openai_provider import OpenAIProvider
+
+# Anthropic's Messages API requires max_tokens; the streaming path leaves it unset
+_ANTHROPIC_DEFAULT_MAX_TOKENS = 4096
+
+# The SDK clients used for the streamed calls run with max_retries=0 because
+# BaseProvider.generate retries them; batch submit/poll/download calls have no
+# such wrapper, so they get the SDK's own backoff.
+BATCH_CLIENT_MAX_RETRIES = 5
+
+# Batch jobs run for hours, so submissions and state changes are reported as
+# they happen rather than buffered with the per-call status lines.
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.StreamHandler(sys.stdout))
+_log.setLevel(logging.INFO)
+_log.propagate = False
+
+
+@dataclass(slots=True, frozen=True)
+class BatchRequest:
+    # Batch APIs only accept [a-zA-Z0-9_-]{1,64} ids; results are joined back on it
+    custom_id: str
+    system_prompt: str
+    user_prompt: str
+    image_path: Optional[str] = None
+    json_schema: Optional[Dict[str, Any]] = None
+
+
+def _error_response(
+    error_category: str,
+    error_message: Optional[str] = None,
+    http_status: Optional[int] = None,
+) -> ProviderResponse:
+    return ProviderResponse(
+        text=None,
+        input_tokens=None,
+        output_tokens=None,
+        output_chars=None,
+        ttft_ms=None,
+        total_latency_ms=None,
+        http_status=http_status,
+        error_category=error_category,
+        error_message=error_message,
+    )
+
+
+def _text_response(
+    text: Optional[str],
+    input_tokens: Optional[int],
+    output_tokens: Optional[int],
+    cached_tokens: Optional[int],
+    model: Optional[str],
+) -> ProviderResponse:
+    if text:
+        text = text.strip()
+    # Batch results have no stream, so there is no TTFT or per-call latency
+    return ProviderResponse(
+        text=text,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        output_chars=len(text) if text else None,
+        ttft_ms=None,
+        total_latency_ms=None,
+        http_status=200,
+        error_category=None,
+        response_params={"model": model} if model else None,
+        cached_tokens=cached_tokens,
+    )
+
+
+def _split(
+    items: Sequence[Tuple[Any, int]], max_requests: int, max_bytes: int
+) -> List[List[Any]]:
+    """Group (payload, size) items into runs under the per-batch limits."""
+    chunks: List[List[Any]] = []
+    current: List[Any] = []
+    current_bytes = 0
+    for payload, size in items:
+        if current and (
+            len(current) >= max_requests or current_bytes + size > max_bytes
+        ):
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append(payload)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class BaseBatchProvider:
+    """Submits many requests as provider batch jobs and waits for the results."""
+
+    provider: BaseProvider
+    # Batch jobs finish within hours, so polling more often only burns requests
+    poll_interval_s: float = 30.0
+    # Per-job limits; larger request sets are split across several jobs
+    max_requests: int
+    max_bytes: int
+
+    def _prepare(self, request: BatchRequest) -> Tuple[Any, int]:
+        """Return one request's batch payload and its serialized size in bytes."""
+        raise NotImplementedError
+
+    async def _submit_chunk(self, payloads: List[Any]) -> str:
+        raise NotImplementedError
+
+    async def wait(self, batch_id: str) -> Any:
+        raise NotImplementedError
+
+    async def results(self, batch: Any) -> Dict[str, ProviderResponse]:
+        raise NotImplementedError
+
+    async def submit(self, requests: Sequence[BatchRequest]) -> List[str]:
+        # Every request inlines its base64 image, so payloads are built (and
+        # measured) off the loop
+        prepared = await asyncio.to_thread(
+            lambda: [self._prepare(r) for r in requests]
+        )
+        return [
+            await self._submit_chunk(chunk)
+            for chunk in _split(prepared, self.max_requests, self.max_bytes)
+        ]
+
+    def _state_path(self, state_dir: Path, requests: Sequence[BatchRequest]) -> Path:
+        # The same pending work after a restart maps to the same file
+        digest = hashlib.sha256()
+        for r in sorted(requests, key=lambda r: r.custom_id):
+            digest.update(
+                orjson.dumps(
+                    [
+                        r.custom_id,
+                        r.system_prompt,
+                        r.user_prompt,
+                        r.image_path,
+                        r.json_schema,
+                    ],
+                    option=orjson.OPT_SORT_KEYS,
+                )
+            )
+        name = f"{self.provider.provider_name}_{self.provider.model_name}"
+        return state_dir / f"{name}_{digest.hexdigest()[:16]}.json"
+
+    async def run(
+        self, requests: Sequence[BatchRequest], state_dir: Optional[Path] = None
+    ) -> Dict[str, ProviderResponse]:
+        """Submit the requests (or resume the jobs recorded in state_dir) and
+        return their responses keyed by custom_id. The recorded job ids stay in
+        state_dir until clear_state() is called."""
+        if not requests:
+            return {}
+        model = self.provider.model_name
+        state_path = self._state_path(state_dir, requests) if state_dir else None
+        if state_path is not None and state_path.exists():
+            batch_ids = orjson.loads(state_path.read_bytes())["batch_ids"]
+            _log.info("Resuming %s batches %s", model, ", ".join(batch_ids))
+        else:
+            batch_ids = await self.submit(requests)
+            if state_path is not None:
+                # Recorded before polling, so a restart picks the jobs back up
+                state_path.parent.mkdir(parents=True, exist_ok=True)
+                state_path.write_bytes(orjson.dumps({"batch_ids": batch_ids}))
+            _log.info(
+                "Submitted %d %s requests as batches %s",
+                len(requests),
+                model,
+                ", ".join(batch_ids),
+            )
+        batches = await asyncio.gather(*[self.wait(b) for b in batch_ids])
+        responses: Dict[str, ProviderResponse] = {}
+        for batch in batches:
+            responses.update(await self.results(batch))
+        # Requests the job never answered (expired/cancelled) are logged as errors
+        for request in requests:
+            if request.custom_id not in responses:
+                responses[request.custom_id] = _error_response(
+                    "BatchIncomplete", f"No result in batches {', '.join(batch_ids)}"
+                )
+        return responses
+
+    def clear_state(
+        self, requests: Sequence[BatchRequest], state_dir: Optional[Path]
+    ) -> None:
+        """Forget the jobs recorded for these requests; call once they are saved."""
+        if state_dir is not None:
+            self._state_path(state_dir, requests).unlink(missing_ok=True)
+
+
+class OpenAIBatchProvider(BaseBatchProvider):
+    """OpenAI Batch API (/v1/batches) for chat completions: 24h window, half price."""
+
+    completion_window = "24h"
+    # Batch input files are capped at 50,000 requests and 200 MB
+    max_requests = 50_000
+    max_bytes = 200_000_000
+    _TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+    def __init__(self, provider: OpenAICompatProvider):
+        self.provider = provider
+        self.client = provider.client.with_options(
+            max_retries=BATCH_CLIENT_MAX_RETRIES
+        )
+
+    def _prepare(self, request: BatchRequest) -> Tuple[bytes, int]:
+        messages = self.provider._build_messages(
+            request.system_prompt, request.user_prompt, request.image_path, None
+        )
+        body = self.provider._build_kwargs(messages, request.json_schema)
+        # Batch requests are answered in full; streaming is not supported
+        body.pop("stream", None)
+        body.pop("stream_options", None)
+        line = orjson.dumps(
+            {
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            },
+            option=orjson.OPT_APPEND_NEWLINE,
+        )
+        return line, len(line)
+
+    async def _submit_chunk(self, payloads: List[bytes]) -> str:
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", b"".join(payloads)), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    async def wait(self, batch_id: str) -> Any:
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in self._TERMINAL_STATUSES:
+                _log.info("Batch %s %s", batch_id, batch.status)
+                return batch
+            await asyncio.sleep(self.poll_interval_s)
+
+    async def results(self, batch: Any) -> Dict[str, ProviderResponse]:
+        responses: Dict[str, ProviderResponse] = {}
+        # Successful lines land in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.content.splitlines():
+                if line:
+                    entry = orjson.loads(line)
+                    responses[entry["custom_id"]] = self._parse_line(entry)
+        return responses
+
+    @staticmethod
+    def _parse_line(entry: Dict[str, Any]) -> ProviderResponse:
+        response = entry.get("response") or {}
+        status = response.get("status_code")
+        body = response.get("body") or {}
+        if status != 200:
+            error = entry.get("error") or body.get("error") or {}
+            return _error_response(
+                error.get("code") or error.get("type") or "BatchRequestError",
+                error.get("message"),
+                status,
+            )
+        usage = body.get("usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        choices = body.get("choices") or [{}]
+        return _text_response(
+            (choices[0].get("message") or {}).get("content"),
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens"),
+            details.get("cached_tokens"),
+            body.get("model"),
+        )
+
+
+class AnthropicBatchProvider(BaseBatchProvider):
+    """Anthropic Message Batches API; uses the native SDK since the OpenAI-compatible
+    endpoint has no batch support.
+
+    The streaming AnthropicProvider may point ANTHROPIC_OPENAI_BASE_URL at a
+    gateway, but batches always go to the native API (ANTHROPIC_BASE_URL,
+    api.anthropic.com by default). They authenticate with ANTHROPIC_BATCH_API_KEY,
+    or with ANTHROPIC_API_KEY when the compatibility endpoint is Anthropic's own;
+    see batch_provider_for.
+    """
+
+    # Message Batches are capped at 100,000 requests and 256 MB
+    max_requests = 100_000
+    max_bytes = 256_000_000
+
+    def __init__(self, provider: AnthropicProvider, api_key: str):
+        self.provider = provider
+        self.client = AsyncAnthropic(
+            api_key=api_key,
+            http_client=get_http_client(),
+            max_retries=BATCH_CLIENT_MAX_RETRIES,
+        )
+
+    def _params(self, request: BatchRequest) -> Dict[str, Any]:
+        content: List[Dict[str, Any]] = [{"type": "text", "text": request.user_prompt}]
+        if request.image_path:
+            data = encode_image(request.image_path)
+            content.append(
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": _detect_mime(str(request.image_path)),
+                        "data": data,
+                    },
+                }
+            )
+        params: Dict[str, Any] = {
+            "model": self.provider.model_name,
+            "max_tokens": _ANTHROPIC_DEFAULT_MAX_TOKENS,
+            "messages": [{"role": "user", "content": content}],
+        }
+        if request.system_prompt:
+            # Same system prompt for every request, so cache it across the batch
+            params["system"] = [
+                {
+                    "type": "text",
+                    "text": request.system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        # Apply model-specific overrides, if any; json_schema is not supported here
+        # either, matching the streaming provider.
+        params.update(self.provider.model_configurations)
+        return params
+
+    def _prepare(self, request: BatchRequest) -> Tuple[Dict[str, Any], int]:
+        item = {"custom_id": request.custom_id, "params": self._params(request)}
+        return item, len(orjson.dumps(item))
+
+    async def _submit_chunk(self, payloads: List[Dict[str, Any]]) -> str:
+        batch = await self.client.messages.batches.create(requests=payloads)
+        return batch.id
+
+    async def wait(self, batch_id: str) -> Any:
+        while True:
+            batch = await self.client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == "ended":
+                _log.info("Batch %s ended", batch_id)
+                return batch
+            await asyncio.sleep(self.poll_interval_s)
+
+    async def results(self, batch: Any) -> Dict[str, ProviderResponse]:
+        responses: Dict[str, ProviderResponse] = {}
+        async for entry in await self.client.messages.batches.results(batch.id):
+            result = entry.result
+            if result.type == "succeeded":
+                message = result.message
+                text = "".join(
+                    block.text for block in message.content if block.type == "text"
+                )
+                usage = message.usage
+                responses[entry.custom_id] = _text_response(
+                    text,
+                    usage.input_tokens,
+                    usage.output_tokens,
+                    usage.cache_read_input_tokens,
+                    message.model,
+                )
+            elif result.type == "errored":
+                error = result.error.error
+                responses[entry.custom_id] = _error_response(error.type, error.message)
+            else:
+                # canceled / expired
+                responses[entry.custom_id] = _error_response(
+                    f"Batch{result.type.capitalize()}"
+                )
+        return responses
+
+
+def _anthropic_batch_api_key(provider: AnthropicProvider) -> Optional[str]:
+    key = os.environ.get("ANTHROPIC_BATCH_API_KEY")
+    if key:
+        return key
+    # ANTHROPIC_API_KEY authenticates against ANTHROPIC_OPENAI_BASE_URL; it is
+    # only a native API key when that endpoint is Anthropic's own
+    base_url = provider.base_url
+    if base_url and urlparse(base_url).hostname == "api.anthropic.com":
+        return provider.api_key
+    return None
+
+
+def batch_provider_for(provider: BaseProvider) -> Optional[BaseBatchProvider]:
+    """Return the batch backend for a provider, or None if it only streams."""
+    if isinstance(provider, OpenAIProvider):
+        return OpenAIBatchProvider(provider)
+    if isinstance(provider, AnthropicProvider):
+        api_key = _anthropic_batch_api_key(provider)
+        if api_key is None:
+            _log.warning(
+                "%s streams instead of batching: ANTHROPIC_OPENAI_BASE_URL is not "
+                "api.anthropic.com and ANTHROPIC_BATCH_API_KEY is unset",
+                provider.model_name,
+            )
+            return None
+        return AnthropicBatchProvider(provider, api_key)
+    return None
@@ -1,68 +1,110 @@
 from __future__ import annotations
 
-import base64
+import asyncio
+import io
 import os
 import time
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 from google import genai
+from google.genai import errors
 
-from .base import BaseProvider, ProviderResponse
+from ._image import encode_image_inline
+from .base import BaseProvider, ProviderResponse, retry_after_seconds
 
 
 class GeminiProvider(BaseProvider):
 	provider_name = "gemini"
+	context_cache_ttl_s = 3600
 
 	def __init__(self, model_name: str, **model_configurations: Any) -> None:
 		super().__init__(model_name, **model_configurations)
 		api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 		self.client = genai.Client(api_key=api_key)
-		
+		# system prompt -> (CachedContent name or None if caching was refused, expiry)
+		self._cached_contents: Dict[str, tuple[Optional[str], float]] = {}
+		self._cache_lock: Optional[asyncio.Lock] = None
+
+	async def _cached_system(self, system_prompt: str) -> Optional[str]:
+		# Create the context cache once per system prompt and reuse it by name until
+		# shortly before its TTL runs out. Gemini rejects prompts below its minimum
+		# cacheable size (HTTP 400); remember that and send the prompt inline. Other
+		# failures fall back to inline for that call only.
+		if self._cache_lock is None:
+			self._cache_lock = asyncio.Lock()
+		async with self._cache_lock:
+			entry = self._cached_contents.get(system_prompt)
+			if entry is None or time.monotonic() >= entry[1]:
+				expires_at = time.monotonic() + self.context_cache_ttl_s - 60
+				try:
+					cache = await self.client.aio.caches.create(
+						model=self.model_name,
+						config={"system_instruction": system_prompt, "ttl": f"{self.context_cache_ttl_s}s"},
+					)
+					entry = (cache.name, expires_at)
+				except errors.ClientError as e:
+					if e.code != 400:
+						return None
+					# 400 is the too-small-to-cache rejection; it will not change
+					entry = (None, expires_at)
+				except Exception:
+					# 429/5xx/network: send inline this time and try again next call
+					return None
+				self._cached_contents[system_prompt] = entry
+			return entry[0]
+
 	def _encode_image(self, image_path: str | Path) -> Dict[str, Any]:
-		p = Path(image_path)
-		b = p.read_bytes()
-		mime = {
-			".png": "image/png",
-			".jpg": "image/jpeg",
-			".jpeg": "image/jpeg",
-			".webp": "image/webp",
-		}.get(p.suffix.lower(), "image/png")
-		return {"mime_type": mime, "data": b}
+		return encode_image_inline(image_path)
 
-	def generate(self, system_prompt: str, user_prompt: str, image_path: Optional[str] = None, json_schema: Optional[Dict[str, Any]] = None) -> ProviderResponse:
+	async def _generate_once(self, system_prompt: str, user_prompt: str, image_path: Optional[str] = None, json_schema: Optional[Dict[str, Any]] = None, image_data_url: Optional[str] = None) -> ProviderResponse:
+		cached_content = await self._cached_system(system_prompt) if system_prompt else None
 		parts: list[Any] = []
-		if system_prompt:
+		if system_prompt and cached_content is None:
 			parts.append(system_prompt)
+		# Gemini takes raw bytes rather than a data URL; they come from the shared image cache
 		if image_path:
-			parts.append(self._encode_image(image_path))
+			parts.append({"inline_data": self._encode_image(image_path)})
 		if user_prompt:
 			parts.append(user_prompt)
 
-		# JSON schema in Gemini uses response_mime_type + schema in generation_config
+		# JSON schema in Gemini uses response_mime_type + schema in the generation config
 		gen_config: Dict[str, Any] = dict()
 		if json_schema is not None:
 			gen_config["response_mime_type"] = "application/json"
 			gen_config["response_schema"] = json_schema
+		if cached_content is not None:
+			gen_config["cached_content"] = cached_content
 		gen_config.update(self.model_configurations)
 
-		start = time.perf_counter()
-		first_token_time: Optional[float] = None
+		start = time.perf_counter_ns()
+		first_token_time: Optional[int] = None
 		text: Optional[str] = None
 		http_status: Optional[int] = None
 		error_category: Optional[str] = None
 		error_message: Optional[str] = None
 		response_params: Dict[str, Any] | None = {"model": self.model_name}
+		cached_tokens: Optional[int] = None
+		retry_after_s: Optional[float] = None
 
 		try:
-			response = self.client.models.generate_content(parts, generation_config=gen_config, stream=True)
-			accum: list[str] = []
-			for chunk in response:
+			# Async client so Gemini overlaps with the other providers in the fan-out
+			stream = await self.client.aio.models.generate_content_stream(
+				model=self.model_name, contents=parts, config=gen_config
+			)
+			buf = io.StringIO()
+			async for chunk in stream:
+				usage = chunk.usage_metadata
+				if usage is not None and usage.cached_content_token_count is not None:
+					cached_tokens = usage.cached_content_token_count
 				if chunk.text:
 					if first_token_time is None:
-						first_token_time = time.perf_counter()
-					accum.append(chunk.text)
-			text = "".join(accum).strip()
+						first_token_time = time.perf_counter_ns()
+					buf.write(chunk.text)
+			text = buf.getvalue()
+			# Only pay for a full strip pass when there is padding to remove
+			if text and (text[0].isspace() or text[-1].isspace()):
+				text = text.strip()
 			http_status = 200
 		except Exception as e:
 			error_category = type(e).__name__
@@ -70,19 +112,18 @@ class GeminiProvider(BaseProvider):
 			# Try to extract HTTP status from exceptions
 			if hasattr(e, 'response') and hasattr(e.response, 'status_code'):
 				http_status = e.response.status_code
+				retry_after_s = retry_after_seconds(getattr(e.response, 'headers', None))
 
-		end = time.perf_counter()
-		ttft_ms = (first_token_time - start) * 1000 if first_token_time else None
-		total_latency_ms = (end - start) * 1000
+		end = time.perf_counter_ns()
+		ttft_ms = (first_token_time - start) / 1e6 if first_token_time is not None else None
+		total_latency_ms = (end - start) / 1e6
 
-		input_chars = len(user_prompt) if user_prompt else None
 		output_chars = len(text) if text else None
 
 		return ProviderResponse(
 			text=text,
 			input_tokens=None,
 			output_tokens=None,
-			input_chars=input_chars,
 			output_chars=output_chars,
 			ttft_ms=ttft_ms,
 			total_latency_ms=total_latency_ms,
@@ -90,4 +131,6 @@ class GeminiProvider(BaseProvider):
 			error_category=error_category,
 			error_message=error_message,
 			response_params=response_params,
+			cached_tokens=cached_tokens,
+			retry_after_s=retry_after_s,
 		)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class RateLimitProfile:
+    rpm: int
+    tpm: int
+    max_concurrency: int
+
+
+# Starting limits per provider; replaced at runtime by the limits the API reports
+# in its x-ratelimit-limit-* headers
+PROVIDER_PROFILES: Dict[str, RateLimitProfile] = {
+    "anthropic": RateLimitProfile(rpm=50, tpm=80_000, max_concurrency=5),
+    "openai": RateLimitProfile(rpm=60, tpm=150_000, max_concurrency=10),
+    "gemini": RateLimitProfile(rpm=60, tpm=120_000, max_concurrency=8),
+    "grok": RateLimitProfile(rpm=60, tpm=100_000, max_concurrency=8),
+}
+DEFAULT_PROFILE = RateLimitProfile(rpm=60, tpm=100_000, max_concurrency=8)
+
+# AIMD concurrency control: halve on 429, add one back per successful call
+AIMD_BETA = 0.5
+AIMD_ALPHA = 1.0
+
+_LIMIT_REQUEST_HEADERS = (
+    "x-ratelimit-limit-requests",
+    "anthropic-ratelimit-requests-limit",
+)
+_LIMIT_TOKEN_HEADERS = (
+    "x-ratelimit-limit-tokens",
+    "anthropic-ratelimit-tokens-limit",
+)
+_REMAINING_REQUEST_HEADERS = (
+    "x-ratelimit-remaining-requests",
+    "anthropic-ratelimit-requests-remaining",
+)
+_REMAINING_TOKEN_HEADERS = (
+    "x-ratelimit-remaining-tokens",
+    "anthropic-ratelimit-tokens-remaining",
+)
+
+
+class _TokenBucket:
+    def __init__(self, capacity: float, refill_per_s: float):
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(
+            self.capacity, self.level + (now - self.updated) * self.refill_per_s
+        )
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_s
+
+    def debit(self, amount: float) -> None:
+        self.level -= amount
+
+    def credit(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+    def clamp(self, remaining: float) -> None:
+        self.level = min(self.level, remaining)
+
+    def resize(self, per_minute: float) -> None:
+        # Rate-limit headers report per-minute limits; a raised limit adds its
+        # extra headroom straight away, a lowered one caps the current level
+        if per_minute <= 0 or per_minute == self.capacity:
+            return
+        self._refill(time.monotonic())
+        self.level = min(per_minute, self.level + max(0.0, per_minute - self.capacity))
+        self.capacity = per_minute
+        self.refill_per_s = per_minute / 60
+
+
+class RateLimiter:
+    """Request and token buckets plus an AIMD concurrency cap for one model."""
+
+    def __init__(self, profile: RateLimitProfile):
+        self.requests = _TokenBucket(profile.rpm, profile.rpm / 60)
+        self.tokens = _TokenBucket(profile.tpm, profile.tpm / 60)
+        self.max_concurrency = profile.max_concurrency
+        self.concurrency = float(profile.max_concurrency)
+        self._in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _cond(self) -> asyncio.Condition:
+        # A Condition only works on the loop that first uses it, so each new
+        # event loop gets its own; the buckets carry over between runs.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self._in_flight = 0
+        return self._condition
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int) -> AsyncIterator[float]:
+        cond = self._cond()
+        async with cond:
+            await cond.wait_for(lambda: self._in_flight < int(self.concurrency))
+            self._in_flight += 1
+        try:
+            amount = float(min(estimated_tokens, self.tokens.capacity))
+            while True:
+                now = time.monotonic()
+                delay = max(
+                    self.requests.wait_time(1, now), self.tokens.wait_time(amount, now)
+                )
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.requests.debit(1)
+            self.tokens.debit(amount)
+            yield amount
+        finally:
+            async with cond:
+                self._in_flight -= 1
+                cond.notify_all()
+
+    async def record(
+        self,
+        debited_tokens: float,
+        http_status: Optional[int],
+        used_tokens: Optional[int],
+    ) -> None:
+        # Settle the estimate against the real usage once it is known
+        if used_tokens is not None:
+            self.tokens.credit(debited_tokens - used_tokens)
+        if http_status == 429:
+            self.concurrency = max(1.0, self.concurrency * AIMD_BETA)
+        elif http_status == 200:
+            previous = int(self.concurrency)
+            self.concurrency = min(
+                float(self.max_concurrency), self.concurrency + AIMD_ALPHA
+            )
+            if int(self.concurrency) > previous:
+                # A slot opened up; wake callers blocked in acquire()
+                cond = self._cond()
+                async with cond:
+                    cond.notify_all()
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        for name in _LIMIT_REQUEST_HEADERS:
+            value = headers.get(name)
+            if value is not None and value.isdigit():
+                self.requests.resize(float(value))
+        for name in _LIMIT_TOKEN_HEADERS:
+            value = headers.get(name)
+            if value is not None and value.isdigit():
+                self.tokens.resize(float(value))
+        for name in _REMAINING_REQUEST_HEADERS:
+            value = headers.get(name)
+            if value is not None and value.isdigit():
+                self.requests.clamp(float(value))
+        for name in _REMAINING_TOKEN_HEADERS:
+            value = headers.get(name)
+            if value is not None and value.isdigit():
+                self.tokens.clamp(float(value))
+
+
+_LIMITERS: Dict[Tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    limiter = _LIMITERS.get((provider, model))
+    if limiter is None:
+        profile = PROVIDER_PROFILES.get(provider, DEFAULT_PROFILE)
+        limiter = _LIMITERS[(provider, model)] = RateLimiter(profile)
+    return limiter
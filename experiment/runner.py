@@ -1,18 +1,41 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import functools
+import hashlib
 import json
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+import orjson
 from dotenv import load_dotenv
+from providers._http import aclose_http_client
+from providers._image import encode_image_data_url
+from providers._openai_compat import OpenAICompatProvider, build_chat_messages
 from providers.anthropic_provider import AnthropicProvider
-from providers.base import BaseProvider
+from providers.base import BaseProvider, ProviderResponse
+from providers.batch import BaseBatchProvider, BatchRequest, batch_provider_for
 from providers.gemini_provider import GeminiProvider
 from providers.grok_provider import GrokProvider
 from providers.openai_provider import OpenAIProvider
-from utils.io import load_json, load_yaml, write_json
+from utils.io import file_digest, load_json, load_yaml, write_json
+from utils.llm_cache import ResponseCache, response_cache_key
 from utils.logger import CallLog, JsonlLogger
 
 MODEL_SPECS: List[Tuple[str, str]] = [
@@ -30,7 +53,11 @@ MODEL_SPECS: List[Tuple[str, str]] = [
 ]
 
 
-def create_provider(
+# (provider_name, model_name, provider instance)
+ProviderSpec = Tuple[str, str, BaseProvider]
+
+
+def _new_provider(
     provider: str, model: str, model_configurations: Dict[str, Any]
 ) -> BaseProvider:
     if provider == "openai":
@@ -44,6 +71,38 @@ def create_provider(
     raise ValueError(f"Unknown provider: {provider}")
 
 
+# Provider SDK clients sit on the running loop's HTTP client, so instances are
+# cached per event loop; a later asyncio.run() builds fresh ones.
+_PROVIDERS: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, Dict[Tuple[str, str, str], BaseProvider]
+] = weakref.WeakKeyDictionary()
+
+
+def create_provider(
+    provider: str, model: str, model_configurations: Dict[str, Any]
+) -> BaseProvider:
+    # Providers (and their SDK clients) are reused across tasks; the config is
+    # keyed as canonical JSON so nested dicts/lists stay hashable.
+    key = (provider, model, json.dumps(model_configurations, sort_keys=True))
+    cached = _PROVIDERS.setdefault(asyncio.get_running_loop(), {})
+    instance = cached.get(key)
+    if instance is None:
+        instance = cached[key] = _new_provider(provider, model, model_configurations)
+    return instance
+
+
+def build_providers(model_overrides: Dict[str, Any]) -> Tuple[ProviderSpec, ...]:
+    # Build once per run and pass into run_task for every image
+    return tuple(
+        (
+            provider_name,
+            model_name,
+            create_provider(provider_name, model_name, model_overrides),
+        )
+        for provider_name, model_name in MODEL_SPECS
+    )
+
+
 def read_prompts(prompt_yaml: Path) -> Dict[str, Dict[str, str]]:
     # Expected schema: { prompt_id: { version_name: text } }
     return load_yaml(prompt_yaml)
@@ -60,6 +119,57 @@ def read_json_template(path: Optional[Path]) -> Optional[Dict[str, Any]]:
     return load_json(path)
 
 
+# Snapshot files are written on their own small pool, so disk I/O neither waits
+# behind nor ties up the default executor's workers.
+SNAPSHOT_IO_WORKERS = 2
+_IO_POOL = ThreadPoolExecutor(
+    max_workers=SNAPSHOT_IO_WORKERS, thread_name_prefix="snapshot-io"
+)
+
+
+def _write_snapshot(path: Path, call_log: CallLog) -> None:
+    write_json(path, call_log.to_dict())
+
+
+# Images processed concurrently by the experiment scripts
+DEFAULT_MAX_INFLIGHT = 4
+
+
+async def run_queued(
+    jobs: Iterable[Callable[[], Awaitable[None]]],
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+) -> None:
+    # A fixed pool of workers drains the queue, so up to max_inflight jobs
+    # overlap while each model's RateLimiter keeps it within its vendor limits.
+    queue: asyncio.Queue[Callable[[], Awaitable[None]]] = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    async def worker() -> None:
+        while not queue.empty():
+            job = queue.get_nowait()
+            try:
+                await job()
+            finally:
+                queue.task_done()
+
+    await asyncio.gather(*[worker() for _ in range(max(1, max_inflight))])
+
+
+def _error_response(exc: BaseException) -> ProviderResponse:
+    return ProviderResponse(
+        text=None,
+        input_tokens=None,
+        output_tokens=None,
+        output_chars=None,
+        ttft_ms=None,
+        total_latency_ms=None,
+        http_status=None,
+        error_category=type(exc).__name__,
+        error_message=str(exc),
+    )
+
+
 async def run_task(
     experiment_id: str,
     prompt_id: str,
@@ -70,53 +180,462 @@ async def run_task(
     output_folder: str,
     logger: JsonlLogger,
     model_overrides: Dict[str, Any],
+    cache: Optional[ResponseCache] = None,
+    providers: Optional[Sequence[ProviderSpec]] = None,
+    snapshot_tag: Optional[str] = None,
 ):
-    for provider_name, model_name in MODEL_SPECS:
-        provider = create_provider(provider_name, model_name, model_overrides)
-        print(f"Generating with {model_name}...")
-        response = await provider.generate(
-            system_prompt=system_text or "",
-            user_prompt=prompt_text,
-            image_path=image_path,
-            json_schema=json_template,
+    if providers is None:
+        providers = build_providers(model_overrides)
+    # Encode the image once for the whole fan-out instead of once per provider
+    image_data_url = (
+        await asyncio.to_thread(encode_image_data_url, image_path) if image_path else None
+    )
+    # Chat-completions payload shared by every OpenAI-compatible provider
+    messages = build_chat_messages(system_text or "", prompt_text, image_data_url)
+    generate_kwargs: Dict[str, Any] = dict(
+        system_prompt=system_text or "",
+        user_prompt=prompt_text,
+        image_path=image_path,
+        json_schema=json_template,
+        image_data_url=image_data_url,
+    )
+
+    # Look up every model in the response cache first; only misses are sent
+    cache_keys: List[Optional[str]] = [None] * len(providers)
+    cache_hits: List[bool] = [False] * len(providers)
+    if cache is not None:
+        image_digest = (
+            await asyncio.to_thread(file_digest, image_path) if image_path else None
+        )
+        for i, (provider_name, model_name, _) in enumerate(providers):
+            cache_keys[i] = response_cache_key(
+                provider=provider_name,
+                model=model_name,
+                system_prompt=system_text or "",
+                user_prompt=prompt_text,
+                image_digest=image_digest,
+                json_schema=json_template,
+                config=model_overrides,
+            )
+
+    # Pre-bind every model's call for this task; OpenAI-compatible providers
+    # also take the shared messages list.
+    calls = tuple(
+        functools.partial(
+            provider.generate, prebuilt_messages=messages, **generate_kwargs
         )
-        # Extract sampling params if available
-        temperature = None
-        top_p = None
-        if len(model_overrides):
-            temperature = model_overrides.get("temperature")
-            top_p = model_overrides.get("top_p")
-        else:
-            temperature = 1.0
-            top_p = 1.0
-
-        call_log = CallLog(
-            prompt_id=prompt_id,
-            input_image_path=image_path,
-            user_prompt=prompt_text,
-            model_provider=provider_name,
-            model_name=model_name,
-            temperature=temperature,
-            top_p=top_p,
-            input_chars=response.input_chars,
-            input_tokens=response.input_tokens,
-            output_chars=response.output_chars,
-            output_tokens=response.output_tokens,
-            ttft_ms=response.ttft_ms,
-            total_latency_ms=response.total_latency_ms,
-            response_text=response.text,
-            http_status=response.http_status,
-            error_category=response.error_category,
-            error_message=response.error_message,
-            experiment_id=experiment_id,
+        if isinstance(provider, OpenAICompatProvider)
+        else functools.partial(provider.generate, **generate_kwargs)
+        for _, _, provider in providers
+    )
+
+    async def respond(
+        i: int, call: Callable[[], Awaitable[ProviderResponse]]
+    ) -> ProviderResponse:
+        key = cache_keys[i]
+        if cache is not None and key is not None:
+            # Cache entries live on disk; keep the reads and writes off the loop
+            hit = await asyncio.to_thread(cache.get, key)
+            if hit is not None:
+                cache_hits[i] = True
+                # The stored timings belong to the original call; replaying them
+                # would skew latency stats, so a hit reports none
+                return replace(
+                    ProviderResponse(**hit), ttft_ms=None, total_latency_ms=None
+                )
+        response = await call()
+        if cache is not None and key is not None and response.http_status == 200:
+            await asyncio.to_thread(cache.set, key, asdict(response))
+        return response
+
+    print(f"Generating with {len(providers)} models concurrently...")
+    responses = await asyncio.gather(
+        *[respond(i, call) for i, call in enumerate(calls)],
+        return_exceptions=True,
+    )
+
+    await _record_responses(
+        experiment_id=experiment_id,
+        prompt_id=prompt_id,
+        prompt_text=prompt_text,
+        image_path=image_path,
+        output_folder=output_folder,
+        logger=logger,
+        model_overrides=model_overrides,
+        providers=providers,
+        responses=responses,
+        cache_hits=cache_hits,
+        snapshot_tag=snapshot_tag,
+    )
+
+
+async def _record_responses(
+    experiment_id: str,
+    prompt_id: str,
+    prompt_text: str,
+    image_path: Optional[str],
+    output_folder: str,
+    logger: JsonlLogger,
+    model_overrides: Dict[str, Any],
+    providers: Sequence[ProviderSpec],
+    responses: List[ProviderResponse | BaseException],
+    cache_hits: Optional[List[bool]] = None,
+    snapshot_tag: Optional[str] = None,
+) -> None:
+    if cache_hits is None:
+        cache_hits = [False] * len(providers)
+    # Same prompt for every model, so its length is computed once per task
+    input_chars = len(prompt_text) if prompt_text else None
+
+    # Extract sampling params if available
+    temperature = None
+    top_p = None
+    if len(model_overrides):
+        temperature = model_overrides.get("temperature")
+        top_p = model_overrides.get("top_p")
+    else:
+        temperature = 1.0
+        top_p = 1.0
+
+    call_logs: List[CallLog] = []
+    for (provider_name, model_name, _), response, cache_hit in zip(
+        providers, responses, cache_hits
+    ):
+        if isinstance(response, BaseException):
+            response = _error_response(response)
+
+        call_logs.append(
+            CallLog(
+                prompt_id=prompt_id,
+                input_image_path=image_path,
+                user_prompt=prompt_text,
+                model_provider=provider_name,
+                model_name=model_name,
+                temperature=temperature,
+                top_p=top_p,
+                input_chars=input_chars,
+                input_tokens=response.input_tokens,
+                output_chars=response.output_chars,
+                output_tokens=response.output_tokens,
+                ttft_ms=response.ttft_ms,
+                total_latency_ms=response.total_latency_ms,
+                response_text=response.text,
+                http_status=response.http_status,
+                error_category=response.error_category,
+                error_message=response.error_message,
+                cached_tokens=response.cached_tokens,
+                experiment_id=experiment_id,
+                cache_hit=cache_hit,
+            )
         )
-        logger.write(call_log)
+    logger.write_many(call_logs)
+
+    # Write per-model JSON snapshots under output/{experiment_id}/{model}_{timestamp}.json
+    out_dir = Path(f"output/{output_folder}") / experiment_id
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if snapshot_tag:
+        timestamp = f"{timestamp}_{snapshot_tag}"
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *[
+            loop.run_in_executor(
+                _IO_POOL,
+                _write_snapshot,
+                out_dir / f"{call_log.model_name}_{timestamp}.json",
+                call_log,
+            )
+            for call_log in call_logs
+        ]
+    )
 
-        # Write a per-model JSON snapshot under output/{experiment_id}/{model}_{timestamp}.json
-        out_dir = Path(f"output/{output_folder}") / experiment_id
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_path = out_dir / f"{model_name}_{timestamp}.json"
-        write_json(out_path, call_log.to_dict())
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """Arguments of one run_task call, collected up front for batch mode."""
+
+    experiment_id: str
+    prompt_id: str
+    prompt_text: str
+    system_text: str
+    image_path: Optional[str]
+    json_template: Optional[Dict[str, Any]]
+    # Models still to run for this task (resume); None means every provider
+    providers: Optional[Tuple[ProviderSpec, ...]] = None
+    snapshot_tag: Optional[str] = None
+
+
+def completed_runs(output_folder: str) -> Counter[Tuple[str, str]]:
+    """Count successful snapshots per (experiment_id, model_name) already in
+    output/{output_folder}, so a restarted run can skip finished calls."""
+    done: Counter[Tuple[str, str]] = Counter()
+    root = Path(f"output/{output_folder}")
+    if not root.is_dir():
+        return done
+    for path in root.rglob("*.json"):
+        try:
+            record = orjson.loads(path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            continue
+        if isinstance(record, dict) and record.get("http_status") == 200:
+            done[(record.get("experiment_id"), record.get("model_name"))] += 1
+    return done
+
+
+def pending_providers(
+    providers: Sequence[ProviderSpec],
+    done: Counter[Tuple[str, str]],
+    experiment_id: str,
+    run_num: int,
+) -> Tuple[ProviderSpec, ...]:
+    # Run run_num (0-based) is still owed by models with at most run_num successes
+    return tuple(
+        spec for spec in providers if done[(experiment_id, spec[1])] <= run_num
+    )
+
+
+def _batch_custom_id(task: TaskSpec) -> str:
+    # Batch APIs only accept [a-zA-Z0-9_-]{1,64} ids. Hashing the task's identity
+    # keeps the id, and the batch state file keyed on it, stable across restarts
+    # however the pending tasks are split up.
+    key = "\0".join((task.experiment_id, task.prompt_id, task.snapshot_tag or ""))
+    return "task-" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+async def run_batch(
+    tasks: List[TaskSpec],
+    output_folder: str,
+    logger: JsonlLogger,
+    model_overrides: Dict[str, Any],
+    providers: Optional[Sequence[ProviderSpec]] = None,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+) -> None:
+    """Run every task through the providers' batch APIs where they have one.
+
+    Each model's pending tasks are submitted together as batch jobs (OpenAI
+    Batch API or Anthropic Message Batches), which are billed at half price but
+    may take up to 24h. A model's results are recorded as soon as its own jobs
+    finish. Providers without a batch endpoint fall back to run_task.
+    """
+    if providers is None:
+        providers = build_providers(model_overrides)
+    if not tasks:
+        return
+
+    requests = [
+        BatchRequest(
+            custom_id=_batch_custom_id(task),
+            system_prompt=task.system_text or "",
+            user_prompt=task.prompt_text,
+            image_path=task.image_path,
+            json_schema=task.json_template,
+        )
+        for task in tasks
+    ]
+    if len({request.custom_id for request in requests}) != len(requests):
+        raise ValueError(
+            "run_batch tasks must differ in experiment_id, prompt_id or snapshot_tag"
+        )
+
+    # Resumed tasks may only need some models; None means every provider and an
+    # empty tuple means nothing is left to run
+    task_specs = [
+        tuple(providers) if task.providers is None else task.providers
+        for task in tasks
+    ]
+    backends: Dict[ProviderSpec, Optional[BaseBatchProvider]] = {
+        spec: batch_provider_for(spec[2])
+        for spec in dict.fromkeys(spec for specs in task_specs for spec in specs)
+    }
+
+    # Submitted batch ids are kept here until their results are recorded, so an
+    # interrupted run polls the same jobs instead of submitting them again
+    batch_state_dir = Path(f"output/{output_folder}") / "batches"
+
+    async def run_model(spec: ProviderSpec, backend: BaseBatchProvider) -> None:
+        indices = [i for i, specs in enumerate(task_specs) if spec in specs]
+        model_requests = [requests[i] for i in indices]
+        try:
+            responses: Dict[str, ProviderResponse | BaseException] = dict(
+                await backend.run(model_requests, batch_state_dir)
+            )
+            finished = True
+        except Exception as e:
+            print(f"  ✗ Batch for {spec[0]}:{spec[1]} failed: {e}")
+            responses = {request.custom_id: e for request in model_requests}
+            # A job that was submitted but not collected stays in the state file
+            finished = False
+        for i in indices:
+            task = tasks[i]
+            await _record_responses(
+                experiment_id=task.experiment_id,
+                prompt_id=task.prompt_id,
+                prompt_text=task.prompt_text,
+                image_path=task.image_path,
+                output_folder=output_folder,
+                logger=logger,
+                model_overrides=model_overrides,
+                providers=[spec],
+                responses=[responses[requests[i].custom_id]],
+                snapshot_tag=task.snapshot_tag or requests[i].custom_id,
+            )
+        if finished:
+            # Only forget the jobs once their snapshots and log records are on disk
+            await asyncio.to_thread(logger.flush)
+            backend.clear_state(model_requests, batch_state_dir)
+
+    async def run_streamed(i: int, stream_specs: Tuple[ProviderSpec, ...]) -> None:
+        task = tasks[i]
+        snapshot_tag = task.snapshot_tag or requests[i].custom_id
+        try:
+            await run_task(
+                experiment_id=task.experiment_id,
+                prompt_id=task.prompt_id,
+                prompt_text=task.prompt_text,
+                system_text=task.system_text,
+                image_path=task.image_path,
+                json_template=task.json_template,
+                output_folder=output_folder,
+                logger=logger,
+                model_overrides=model_overrides,
+                providers=stream_specs,
+                snapshot_tag=snapshot_tag,
+            )
+        except Exception as e:
+            print(f"  ✗ [{task.experiment_id}] {snapshot_tag} failed: {e}")
+
+    stream_jobs = []
+    for i, specs in enumerate(task_specs):
+        stream_specs = tuple(spec for spec in specs if backends[spec] is None)
+        if stream_specs:
+            stream_jobs.append(functools.partial(run_streamed, i, stream_specs))
+    batch_models = [
+        (spec, backend) for spec, backend in backends.items() if backend is not None
+    ]
+
+    print(
+        f"Submitting {len(requests)} tasks to {len(batch_models)} batch models "
+        f"({len(backends) - len(batch_models)} models stream)..."
+    )
+    # Streaming providers work through the tasks while the batch jobs are pending
+    await asyncio.gather(
+        *[run_model(spec, backend) for spec, backend in batch_models],
+        run_queued(stream_jobs, max_inflight),
+    )
+
+
+async def run_image_jobs(
+    jobs: Sequence[Tuple[str, str]],
+    prompt_id: str,
+    prompt_text: str,
+    system_text: str,
+    json_template: Optional[Dict[str, Any]],
+    output_folder: str,
+    num_runs: int,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    cache_dir: Optional[Path] = None,
+    mode: str = "stream",
+    resume: bool = True,
+    label: str = "experiment",
+) -> int:
+    """Run every (experiment_id, image_path) job num_runs times across all models.
+
+    Shared by the experiment scripts. With resume, (experiment, model, run) calls
+    that already have a successful snapshot in output/{output_folder} are skipped;
+    mode="batch" routes OpenAI/Anthropic calls through run_batch. Returns the
+    number of (image, run) jobs processed.
+    """
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    with JsonlLogger(Path(f"output/{output_folder}") / "calls.jsonl") as logger:
+        try:
+            # Provider clients are built once and reused for every image and run
+            providers = build_providers({})
+
+            done = completed_runs(output_folder) if resume else Counter()
+            if done:
+                print(f"Resuming: {sum(done.values())} successful calls already saved")
+
+            # One job per (image, run) that still has models left to call
+            run_jobs: List[Tuple[str, str, int, Tuple[ProviderSpec, ...]]] = []
+            for experiment_id, image_path in jobs:
+                for run_num in range(num_runs):
+                    run_providers = pending_providers(
+                        providers, done, experiment_id, run_num
+                    )
+                    if run_providers:
+                        run_jobs.append(
+                            (experiment_id, image_path, run_num, run_providers)
+                        )
+
+            if mode == "batch":
+                tasks = [
+                    TaskSpec(
+                        experiment_id=experiment_id,
+                        prompt_id=prompt_id,
+                        prompt_text=prompt_text,
+                        system_text=system_text,
+                        image_path=image_path,
+                        json_template=json_template,
+                        providers=run_providers,
+                        snapshot_tag=f"run{run_num + 1}",
+                    )
+                    for experiment_id, image_path, run_num, run_providers in run_jobs
+                ]
+                await run_batch(
+                    tasks, output_folder, logger, {}, providers, max_inflight
+                )
+                return len(tasks)
+
+            total = len(run_jobs)
+            completed = 0
+
+            # Every (image, run) pair is its own job, so repeated runs of one
+            # image overlap too; up to max_inflight of them are in flight at once.
+            async def run_once(
+                experiment_id: str,
+                image_path: str,
+                run_num: int,
+                run_providers: Tuple[ProviderSpec, ...],
+            ) -> None:
+                nonlocal completed
+                print(
+                    f"\nRunning {label} {experiment_id} run {run_num + 1}/{num_runs} "
+                    f"({completed + 1}/{total})"
+                )
+                print(f"  [{experiment_id}] Image path: {image_path}")
+
+                try:
+                    await run_task(
+                        experiment_id=experiment_id,
+                        prompt_id=prompt_id,
+                        prompt_text=prompt_text,
+                        system_text=system_text,
+                        image_path=image_path,
+                        json_template=json_template,
+                        output_folder=output_folder,
+                        logger=logger,
+                        model_overrides={},
+                        cache=cache,
+                        providers=run_providers,
+                        # Concurrent runs can share a timestamp; keep their
+                        # snapshots apart
+                        snapshot_tag=f"run{run_num + 1}",
+                    )
+                    print(
+                        f"  ✓ [{experiment_id}] Run {run_num + 1} completed successfully"
+                    )
+                except Exception as e:
+                    print(f"  ✗ [{experiment_id}] Run {run_num + 1} failed: {e}")
+
+                completed += 1
+
+            await run_queued(
+                [functools.partial(run_once, *job) for job in run_jobs],
+                max_inflight,
+            )
+            return completed
+        finally:
+            # The shared HTTP client belongs to this event loop; close it with the run
+            await aclose_http_client()
 
 
 def main():
@@ -143,11 +662,27 @@ def main():
     parser.add_argument("--system_ver", required=True, help="System version key")
     parser.add_argument("--image", required=False, help="Optional image path")
     parser.add_argument("--experiment_id", required=True, help="Experiment ID label")
+    parser.add_argument(
+        "--output_folder",
+        default="default",
+        help="Folder under output/ for per-model JSON snapshots",
+    )
     parser.add_argument(
         "--model_overrides",
         required=False,
         help="JSON for model configuration overrides",
     )
+    parser.add_argument(
+        "--cache_dir",
+        required=False,
+        help="Optional directory for an exact-match response cache",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=("stream", "batch"),
+        default="stream",
+        help="batch submits OpenAI/Anthropic requests through their Batch APIs",
+    )
 
     args = parser.parse_args()
 
@@ -162,18 +697,38 @@ def main():
     image_path = args.image if args.image else None
     model_overrides = json.loads(args.model_overrides) if args.model_overrides else {}
 
-    logger = JsonlLogger()
+    cache = ResponseCache(args.cache_dir) if args.cache_dir else None
 
-    run_task(
-        experiment_id=args.experiment_id,
-        prompt_id=args.prompt_id,
-        prompt_text=prompt_text,
-        system_text=system_text,
-        image_path=image_path,
-        json_template=json_template,
-        logger=logger,
-        model_overrides=model_overrides,
-    )
+    async def _run(logger: JsonlLogger) -> None:
+        try:
+            if args.mode == "batch":
+                task = TaskSpec(
+                    experiment_id=args.experiment_id,
+                    prompt_id=args.prompt_id,
+                    prompt_text=prompt_text,
+                    system_text=system_text,
+                    image_path=image_path,
+                    json_template=json_template,
+                )
+                await run_batch([task], args.output_folder, logger, model_overrides)
+                return
+            await run_task(
+                experiment_id=args.experiment_id,
+                prompt_id=args.prompt_id,
+                prompt_text=prompt_text,
+                system_text=system_text,
+                image_path=image_path,
+                json_template=json_template,
+                output_folder=args.output_folder,
+                logger=logger,
+                model_overrides=model_overrides,
+                cache=cache,
+            )
+        finally:
+            await aclose_http_client()
+
+    with JsonlLogger(Path(f"output/{args.output_folder}") / "calls.jsonl") as logger:
+        asyncio.run(_run(logger))
 
 
 if __name__ == "__main__":
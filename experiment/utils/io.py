@@ -1,20 +1,59 @@
-import json
+import functools
+import hashlib
+import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import orjson
 import yaml
 
+try:
+	# SIMD, multithreaded hashing for large image files
+	import blake3
+except ImportError:  # pragma: no cover - optional speedup
+	blake3 = None
+
+# libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+# Parsed config files are memoized on (path, mtime) so repeated runs in one
+# process skip the reparse; callers share the result and must not mutate it.
+@functools.lru_cache(maxsize=8)
+def _load_yaml_cached(path: str, mtime_ns: int) -> Any:
+	with open(path, 'r', encoding='utf-8') as f:
+		return yaml.load(f, Loader=_YAML_LOADER)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_json_cached(path: str, mtime_ns: int) -> Any:
+	return orjson.loads(Path(path).read_bytes())
+
 
 def load_yaml(path: str | Path) -> Any:
-	p = Path(path)
-	with p.open('r', encoding='utf-8') as f:
-		return yaml.safe_load(f)
+	return _load_yaml_cached(str(path), os.stat(path).st_mtime_ns)
 
 
 def load_json(path: str | Path) -> Any:
-	p = Path(path)
-	with p.open('r', encoding='utf-8') as f:
-		return json.load(f)
+	return _load_json_cached(str(path), os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def _file_digest_cached(path: str, mtime_ns: int, size: int, chunk_size: int) -> str:
+	if blake3 is not None:
+		h = blake3.blake3(max_threads=blake3.blake3.AUTO)
+	else:
+		h = hashlib.sha256()
+	with open(path, 'rb') as f:
+		while chunk := f.read(chunk_size):
+			h.update(chunk)
+	# Prefix the algorithm so cache keys never mix digests from different hashers
+	return f"{h.name}:{h.hexdigest()}"
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+	st = os.stat(path)
+	return _file_digest_cached(str(path), st.st_mtime_ns, st.st_size, chunk_size)
 
 
 def ensure_dir(path: str | Path) -> Path:
@@ -26,13 +65,11 @@ def ensure_dir(path: str | Path) -> Path:
 def write_jsonl(path: str | Path, records: List[Dict[str, Any]]) -> None:
 	p = Path(path)
 	p.parent.mkdir(parents=True, exist_ok=True)
-	with p.open('a', encoding='utf-8') as f:
-		for rec in records:
-			f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+	with p.open('ab') as f:
+		f.writelines(orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE) for rec in records)
 
 
 def write_json(path: str | Path, data: Any) -> None:
 	p = Path(path)
 	p.parent.mkdir(parents=True, exist_ok=True)
-	with p.open('w', encoding='utf-8') as f:
-		json.dump(data, f, ensure_ascii=False, indent=2)
+	p.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
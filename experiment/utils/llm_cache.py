@@ -0,0 +1,61 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+from .io import write_json
+
+
+def response_cache_key(
+	provider: str,
+	model: str,
+	system_prompt: str,
+	user_prompt: str,
+	image_digest: Optional[str],
+	json_schema: Optional[Dict[str, Any]],
+	config: Dict[str, Any],
+) -> str:
+	payload = {
+		"provider": provider,
+		"model": model,
+		"sys": system_prompt,
+		"prompt": user_prompt,
+		"img_hash": image_digest,
+		"schema": json_schema,
+		"cfg": config,
+	}
+	return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+	"""Exact-match cache of successful provider responses.
+
+	Opt-in only: repeated runs normally exist to sample the model again, so enable
+	it for deterministic settings (e.g. temperature=0) or to resume interrupted runs.
+	With a directory, entries are persisted as one JSON file per key.
+	"""
+
+	def __init__(self, directory: Optional[str | Path] = None) -> None:
+		self.directory = Path(directory) if directory else None
+		self._memory: Dict[str, Dict[str, Any]] = {}
+
+	def _path(self, key: str) -> Path:
+		assert self.directory is not None
+		return self.directory / key[:2] / f"{key}.json"
+
+	def get(self, key: str) -> Optional[Dict[str, Any]]:
+		value = self._memory.get(key)
+		if value is None and self.directory is not None:
+			p = self._path(key)
+			if p.exists():
+				# Read directly: load_json's small memo is for config files, and the
+				# in-memory dict already keeps this entry
+				value = self._memory[key] = orjson.loads(p.read_bytes())
+		return value
+
+	def set(self, key: str, value: Dict[str, Any]) -> None:
+		self._memory[key] = value
+		if self.directory is not None:
+			write_json(self._path(key), value)
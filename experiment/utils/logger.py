@@ -1,12 +1,51 @@
 from __future__ import annotations
 
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
 from dataclasses import asdict, dataclass
-from typing import Any, Dict, Optional
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
 
+import orjson
 from colorama import Fore, Style
 
+# Serialized records held in memory before one vectored write into the file
+FLUSH_EVERY = 64
 
-@dataclass
+# Buffers the kernel accepts per writev() call (1024 on Linux)
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):  # pragma: no cover - non-POSIX
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _writev_all(fd: int, bufs: List[bytes]) -> None:
+    # Hand every record to the kernel as-is, IOV_MAX buffers per syscall,
+    # instead of copying them into one contiguous buffer first.
+    if not hasattr(os, "writev"):  # pragma: no cover - Windows
+        os.write(fd, b"".join(bufs))
+        return
+    for start in range(0, len(bufs), _IOV_MAX):
+        iov: List[bytes | memoryview] = list(bufs[start : start + _IOV_MAX])
+        i = 0
+        while i < len(iov):
+            written = os.writev(fd, iov[i:])
+            # A short write drops the fully written buffers and trims the next one
+            while i < len(iov) and written >= len(iov[i]):
+                written -= len(iov[i])
+                i += 1
+            if written:
+                iov[i] = memoryview(iov[i])[written:]
+
+
+@dataclass(slots=True)
 class CallLog:
     # Inputs
     prompt_id: str
@@ -31,17 +70,137 @@ class CallLog:
     # Sampling params (if available)
     temperature: Optional[float] = None
     top_p: Optional[float] = None
+    # Prompt tokens served from the provider-side prompt cache
+    cached_tokens: Optional[int] = None
     # Misc
     experiment_id: Optional[str] = None
+    cache_hit: bool = False
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
 
+# Status lines are buffered in memory and written to stdout in batches of
+# STATUS_BUFFER records (or on close), instead of one console write per call.
+STATUS_BUFFER = 256
+_status_log = logging.getLogger(__name__)
+_status_handler = logging.handlers.MemoryHandler(
+    capacity=STATUS_BUFFER, target=logging.StreamHandler(sys.stdout)
+)
+_status_log.addHandler(_status_handler)
+_status_log.setLevel(logging.INFO)
+_status_log.propagate = False
+# Color codes only make sense on a terminal
+_GREEN, _RESET = (Fore.GREEN, Style.RESET_ALL) if sys.stdout.isatty() else ("", "")
+
+
+# Tells the writer thread to write what is left and exit
+_CLOSE = object()
+
+
 class JsonlLogger:
+    def __init__(self, path: Optional[str | Path] = None) -> None:
+        # Optional JSONL sink. A writer thread owns the file: write_many() only
+        # enqueues the records, and the thread serializes them and writes them
+        # in one os.writev() per FLUSH_EVERY records, once the queue runs dry,
+        # on flush()/close(), or at interpreter exit (including after Ctrl+C).
+        # The file is unbuffered: the thread's batch is the only userspace copy.
+        self.path = Path(path) if path else None
+        self._f: Optional[IO[bytes]] = None
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # First serialization/write failure on the writer thread, re-raised to
+        # callers of write_many(), flush() and close()
+        self._error: Optional[BaseException] = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = self.path.open("ab", buffering=0)
+            self._thread = threading.Thread(
+                target=self._writer_loop, name="jsonl-logger", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _writer_loop(self) -> None:
+        assert self._f is not None
+        fd = self._f.fileno()
+        buf: List[bytes] = []
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _CLOSE or isinstance(item, threading.Event):
+                    # close()/flush(): write what is pending first
+                    if buf:
+                        _writev_all(fd, buf)
+                else:
+                    buf.extend(
+                        orjson.dumps(
+                            call_log.to_dict(), option=orjson.OPT_APPEND_NEWLINE
+                        )
+                        for call_log in item
+                    )
+                    # Write when the batch is full or nothing else is waiting, so
+                    # records reach the file promptly without a syscall per record
+                    if len(buf) < FLUSH_EVERY and not self._queue.empty():
+                        continue
+                    _writev_all(fd, buf)
+            except Exception as e:
+                # Keep draining so flush() callers are still released; the error
+                # surfaces in the caller's next write_many()/flush()/close()
+                if self._error is None:
+                    self._error = e
+            buf.clear()
+            if item is _CLOSE:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
     def write(self, call_log: CallLog) -> None:
-        print(
-            Fore.GREEN
-            + f"Logged {call_log.model_provider}:{call_log.model_name} prompt={call_log.prompt_id} status={call_log.http_status}"
-            + Style.RESET_ALL
+        self.write_many([call_log])
+
+    def write_many(self, call_logs: List[CallLog]) -> None:
+        if not call_logs:
+            return
+        self._raise_error()
+        if self._thread is not None and self._thread.is_alive():
+            # Hand off and return; serialization and I/O happen on the writer thread
+            self._queue.put(list(call_logs))
+        # One buffered record for the whole batch instead of one print per model
+        _status_log.info(
+            "\n".join(
+                f"{_GREEN}Logged {call_log.model_provider}:{call_log.model_name} prompt={call_log.prompt_id} status={call_log.http_status}{_RESET}"
+                for call_log in call_logs
+            )
         )
+
+    def flush(self) -> None:
+        _status_handler.flush()
+        # Blocks until every record queued so far is in the file
+        if self._thread is not None and self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+        self._raise_error()
+
+    def close(self) -> None:
+        # Closed explicitly; the exit hook has nothing left to do (or re-raise)
+        atexit.unregister(self.close)
+        _status_handler.flush()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(_CLOSE)
+                self._thread.join()
+            if self._f is not None and not self._f.closed:
+                self._f.close()
+        self._raise_error()
+
+    def __enter__(self) -> JsonlLogger:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
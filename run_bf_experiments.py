@@ -6,17 +6,24 @@ run a configurable number of times.
 """
 
 import asyncio
+import os
 import sys
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
 # Add the experiment directory to the path so we can import from runner.py
 sys.path.append(str(Path(__file__).parent / "experiment"))
 
-from experiment.runner import read_json_template, read_prompts, read_systems, run_task
-from experiment.utils.logger import JsonlLogger
-from run_experiments import find_image_in_folder
+from experiment.runner import (
+    DEFAULT_MAX_INFLIGHT,
+    read_json_template,
+    read_prompts,
+    read_systems,
+    run_image_jobs,
+)
+from run_experiments import find_image_in_folder, is_image_name
 
 
 def get_all_bf_experiment_folders(data_dir: Path, start_from: int = 0) -> list[Path]:
@@ -33,13 +40,15 @@ def get_all_bf_experiment_folders(data_dir: Path, start_from: int = 0) -> list[P
         print(f"Error: Data directory {data_dir} does not exist")
         return experiment_folders
 
-    for item in data_dir.iterdir():
-        if item.is_dir():
-            image_path = find_image_in_folder(item)
-            if image_path:
-                experiment_folders.append(item)
-            else:
-                print(f"Warning: No image found in folder {item.name}")
+    with os.scandir(data_dir) as it:
+        entries = [e for e in it if e.is_dir()]
+
+    for entry in entries:
+        image_path = find_image_in_folder(entry.path)
+        if image_path:
+            experiment_folders.append(Path(entry.path))
+        else:
+            print(f"Warning: No image found in folder {entry.name}")
 
     experiment_folders = sorted(experiment_folders, key=lambda p: p.name)
 
@@ -59,9 +68,18 @@ async def run_bf_experiments(
     output_folder: str,
     num_runs: int = 3,
     start_from: int = 0,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    cache_dir: Optional[Path] = None,
+    mode: str = "stream",
+    resume: bool = True,
 ) -> None:
     """
     Run burst-fracture experiments on all subfolders in the data directory.
+    Up to max_inflight image runs are processed concurrently. With cache_dir set,
+    successful responses are cached and reused on identical requests. With
+    mode="batch", OpenAI and Anthropic requests go through their Batch APIs.
+    With resume, (slice, model, run) calls that already have a successful
+    snapshot in the output folder are skipped.
     """
     print("Loading prompts and systems...")
     prompts = read_prompts(prompts_file)
@@ -84,59 +102,36 @@ async def run_bf_experiments(
         print("No experiment folders found. Exiting.")
         return
 
-    logger = JsonlLogger()
-
-    image_extensions = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif"}
-    image_jobs: list[tuple[Path, Path]] = []
-
+    # One job per image; the experiment id is the folder plus the slice
+    # filename (e.g., "slice_381")
+    jobs: list[tuple[str, str]] = []
     for folder in experiment_folders:
-        for file_path in sorted(folder.iterdir()):
-            if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-                image_jobs.append((folder, file_path))
+        with os.scandir(folder) as it:
+            image_paths = sorted(
+                e.path for e in it if e.is_file() and is_image_name(e.name)
+            )
+        jobs.extend((f"{folder.name}/{Path(p).stem}", p) for p in image_paths)
 
-    if not image_jobs:
+    if not jobs:
         print("No images found in any BF experiment folder. Exiting.")
         return
 
-    total_experiments = len(image_jobs) * num_runs
-    current_experiment = 0
-
-    for folder, image_file in image_jobs:
-        experiment_id = folder.name
-        image_path = str(image_file)
-
-        # Derive a per-image subfolder name from the slice filename (e.g., "slice_381")
-        slice_name = image_file.stem
-        experiment_id_with_slice = f"{experiment_id}/{slice_name}"
+    completed = await run_image_jobs(
+        jobs,
+        prompt_id="structured_findings_extraction",
+        prompt_text=prompt_text,
+        system_text=system_text,
+        json_template=json_template,
+        output_folder=output_folder,
+        num_runs=num_runs,
+        max_inflight=max_inflight,
+        cache_dir=cache_dir,
+        mode=mode,
+        resume=resume,
+        label="BF experiment",
+    )
 
-        print(
-            f"\nRunning BF experiment {experiment_id_with_slice} "
-            f"({current_experiment + 1}/{total_experiments})"
-        )
-        print(f"Image path: {image_path}")
-
-        for run_num in range(num_runs):
-            print(f"  Run {run_num + 1}/{num_runs}")
-
-            try:
-                await run_task(
-                    experiment_id=experiment_id_with_slice,
-                    prompt_id="structured_findings_extraction",
-                    prompt_text=prompt_text,
-                    system_text=system_text,
-                    image_path=image_path,
-                    json_template=json_template,
-                    output_folder=output_folder,
-                    logger=logger,
-                    model_overrides={},
-                )
-                print(f"  ✓ Run {run_num + 1} completed successfully")
-            except Exception as e:
-                print(f"  ✗ Run {run_num + 1} failed: {e}")
-
-            current_experiment += 1
-
-    print(f"\nCompleted {current_experiment} BF experiments total")
+    print(f"\nCompleted {completed} BF experiments total")
     print("Results saved to output directory")
 
 
@@ -152,6 +147,8 @@ def main():
     systems_file = script_dir / "prompts" / "system_prompts.sample.yaml"
     json_template_file = script_dir / "schemas" / "bf_template.json"
     output_folder = "bf-v2"
+    # "batch" uses the OpenAI/Anthropic Batch APIs: half price, results within 24h
+    mode = "stream"
 
     required_files = [data_dir, prompts_file, systems_file, json_template_file]
     for file_path in required_files:
@@ -176,6 +173,7 @@ def main():
             output_folder=output_folder,
             num_runs=1,
             start_from=0,
+            mode=mode,
         )
     )
 
@@ -14,20 +14,32 @@ from typing import List, Optional
 sys.path.append(str(Path(__file__).parent / "experiment"))
 
 from dotenv import load_dotenv
-from experiment.runner import read_json_template, read_prompts, read_systems, run_task
-from experiment.utils.logger import JsonlLogger
+from experiment.runner import (
+    DEFAULT_MAX_INFLIGHT,
+    read_json_template,
+    read_prompts,
+    read_systems,
+    run_image_jobs,
+)
 
 
-def find_image_in_folder(folder_path: Path) -> Optional[str]:
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif")
+
+
+def is_image_name(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def find_image_in_folder(folder_path: Path | str) -> Optional[str]:
     """
     Find the image file in a folder. Assumes there's only one image file per folder.
     Returns the full path to the image file, or None if not found.
     """
-    image_extensions = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif"}
-
-    for file_path in folder_path.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-            return str(file_path)
+    # DirEntry carries d_type from the directory read, so is_file() needs no stat
+    with os.scandir(folder_path) as it:
+        for entry in it:
+            if entry.is_file() and is_image_name(entry.name):
+                return entry.path
 
     return None
 
@@ -46,20 +58,22 @@ def get_all_experiment_folders(data_dir: Path, start_from: int = 0) -> List[Path
         print(f"Error: Data directory {data_dir} does not exist")
         return experiment_folders
 
-    for item in data_dir.iterdir():
-        if item.is_dir():
-            # Check if folder name is a valid experiment ID and meets the start_from criteria
-            if item.name.isdigit():
-                experiment_id = int(item.name)
-                if experiment_id >= start_from:
-                    # Check if folder contains an image
-                    image_path = find_image_in_folder(item)
-                    if image_path:
-                        experiment_folders.append(item)
-                    else:
-                        print(f"Warning: No image found in folder {item.name}")
-            else:
-                print(f"Warning: Skipping non-numeric folder {item.name}")
+    with os.scandir(data_dir) as it:
+        entries = [e for e in it if e.is_dir()]
+
+    for entry in entries:
+        # Check if folder name is a valid experiment ID and meets the start_from criteria
+        if entry.name.isdigit():
+            experiment_id = int(entry.name)
+            if experiment_id >= start_from:
+                # Check if folder contains an image
+                image_path = find_image_in_folder(entry.path)
+                if image_path:
+                    experiment_folders.append(Path(entry.path))
+                else:
+                    print(f"Warning: No image found in folder {entry.name}")
+        else:
+            print(f"Warning: Skipping non-numeric folder {entry.name}")
 
     return sorted(
         experiment_folders,
@@ -77,6 +91,10 @@ async def run_mls_experiments(
     output_folder: str,
     num_runs: int = 3,
     start_from: int = 0,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    cache_dir: Optional[Path] = None,
+    mode: str = "stream",
+    resume: bool = True,
 ) -> None:
     """
     Run MLS experiments on all subfolders in the data directory.
@@ -88,6 +106,13 @@ async def run_mls_experiments(
         json_template_file: Path to the JSON template file
         num_runs: Number of times to run each experiment (default: 3)
         start_from: Only run experiments with ID >= start_from (default: 0)
+        max_inflight: Number of experiment runs processed concurrently
+        cache_dir: Optional response-cache directory; reruns reuse cached
+            successful responses instead of calling the models again
+        mode: "stream" calls every model live; "batch" sends OpenAI and
+            Anthropic requests through their Batch APIs (half price, up to 24h)
+        resume: Skip (experiment, model, run) calls that already have a
+            successful snapshot in the output folder
     """
     # Load prompts and systems
     print("Loading prompts and systems...")
@@ -112,49 +137,29 @@ async def run_mls_experiments(
         print("No experiment folders found. Exiting.")
         return
 
-    # Initialize logger
-    logger = JsonlLogger()
-
-    total_experiments = len(experiment_folders) * num_runs
-    current_experiment = 0
-
-    # Run experiments
+    jobs: list[tuple[str, str]] = []
     for folder in experiment_folders:
-        experiment_id = folder.name
         image_path = find_image_in_folder(folder)
-
         if not image_path:
-            print(f"Skipping folder {experiment_id} - no image found")
+            print(f"Skipping folder {folder.name} - no image found")
             continue
+        jobs.append((folder.name, image_path))
+
+    completed = await run_image_jobs(
+        jobs,
+        prompt_id="triage",
+        prompt_text=prompt_text,
+        system_text=system_text,
+        json_template=json_template,
+        output_folder=output_folder,
+        num_runs=num_runs,
+        max_inflight=max_inflight,
+        cache_dir=cache_dir,
+        mode=mode,
+        resume=resume,
+    )
 
-        print(
-            f"\nRunning experiment {experiment_id} ({current_experiment + 1}/{total_experiments})"
-        )
-        print(f"Image path: {image_path}")
-
-        # Run the experiment num_runs times
-        for run_num in range(num_runs):
-            print(f"  Run {run_num + 1}/{num_runs}")
-
-            try:
-                await run_task(
-                    experiment_id=experiment_id,
-                    prompt_id="triage",
-                    prompt_text=prompt_text,
-                    system_text=system_text,
-                    image_path=image_path,
-                    json_template=json_template,
-                    output_folder=output_folder,
-                    logger=logger,
-                    model_overrides={},
-                )
-                print(f"  ✓ Run {run_num + 1} completed successfully")
-            except Exception as e:
-                print(f"  ✗ Run {run_num + 1} failed: {e}")
-
-            current_experiment += 1
-
-    print(f"\nCompleted {current_experiment} experiments total")
+    print(f"\nCompleted {completed} experiments total")
     print("Results saved to output directory")
 
 
@@ -171,6 +176,8 @@ def main():
     systems_file = script_dir / "prompts" / "system_prompts.sample.yaml"
     json_template_file = script_dir / "schemas" / "triage_template.json"
     output_folder = "triage-v2"
+    # "batch" uses the OpenAI/Anthropic Batch APIs: half price, results within 24h
+    mode = "stream"
 
     # Verify all required files exist
     required_files = [data_dir, prompts_file, systems_file, json_template_file]
@@ -197,6 +204,7 @@ def main():
             output_folder=output_folder,
             num_runs=1,
             start_from=0,
+            mode=mode,
         )
     )
 